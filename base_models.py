@@ -1,10 +1,12 @@
 """Base models for document parsing to reduce code duplication through inheritance."""
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
+import orjson
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class BaseEntry:
     """Base class for document entries to reduce code duplication.
     
@@ -18,8 +20,10 @@ class BaseEntry:
         page: Starting page number of the section
         level: Depth level (chapter = 1, section = 2, etc.)
         parent_id: Immediate parent section (null for top level)
-        full_path: Concatenation of section_id and title
         tags: Optional semantic labels
+    
+    The full_path (section_id and title) is computed on access rather
+    than stored, so it can never drift out of sync with its parts.
     """
     doc_title: str
     section_id: str
@@ -27,16 +31,40 @@ class BaseEntry:
     page: int
     level: int
     parent_id: Optional[str]
-    full_path: str
     tags: List[str]
     
+    @property
+    def full_path(self) -> str:
+        """Concatenation of section_id and title (e.g., "2.1.2 Overview")."""
+        return f"{self.section_id} {self.title}"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the entry to a dictionary in output schema field order.
+        
+        Returns:
+            Dictionary of all fields, including the computed full_path
+        """
+        return {
+            "doc_title": self.doc_title,
+            "section_id": self.section_id,
+            "title": self.title,
+            "page": self.page,
+            "level": self.level,
+            "parent_id": self.parent_id,
+            "full_path": self.full_path,
+            "tags": self.tags,
+        }
+    
     def get_hierarchy_level(self) -> int:
-        """Get the hierarchy level based on section ID.
+        """Get the hierarchy level of this entry.
+        
+        The level is derived from the section ID once, when the entry is
+        built, so this does not re-parse section_id.
         
         Returns:
             The depth level of this entry in the document hierarchy
         """
-        return self.section_id.count(".") + 1
+        return self.level
     
     def is_top_level(self) -> bool:
         """Check if this entry is at the top level of the hierarchy.
@@ -55,7 +83,7 @@ class BaseEntry:
         return self.parent_id
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TocEntry(BaseEntry):
     """Represents a single entry in the Table of Contents.
     
@@ -65,7 +93,7 @@ class TocEntry(BaseEntry):
     pass
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SectionEntry(BaseEntry):
     """Represents a single section entry from the document.
     
@@ -77,6 +105,17 @@ class SectionEntry(BaseEntry):
     """
     content: str
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the entry to a dictionary in output schema field order.
+        
+        Returns:
+            Dictionary of all fields, including the computed full_path
+            and the section content
+        """
+        data = BaseEntry.to_dict(self)
+        data["content"] = self.content
+        return data
+    
     def get_content_length(self) -> int:
         """Get the length of the section content.
         
@@ -92,3 +131,19 @@ class SectionEntry(BaseEntry):
             True if content exists and is not empty, False otherwise
         """
         return bool(self.content.strip())
+
+
+def write_jsonl(path: str, entries: Iterable[BaseEntry]) -> None:
+    """Write entries to a JSONL file, one compact JSON object per line.
+    
+    Args:
+        path: Path of the output file
+        entries: Entries to write, in order
+    """
+    # A 1 MiB buffer flushes the output in a few large writes
+    with open(path, "wb", buffering=1 << 20) as f:
+        # orjson encodes straight to compact UTF-8 bytes, newline included
+        f.writelines(
+            orjson.dumps(entry.to_dict(), option=orjson.OPT_APPEND_NEWLINE)
+            for entry in entries
+        )
@@ -1,44 +1,89 @@
+import bisect
+import functools
 import json
 import re
-from dataclasses import asdict
-from typing import List, Optional, Tuple
+import string
+import sys
+from typing import AbstractSet, List, Optional, Tuple
 import os
 
-from pypdf import PdfReader
-from base_models import SectionEntry
+from base_models import SectionEntry, write_jsonl
+from pdf_text import get_document_title, load_or_extract_pages, load_pdf_document
 
 
-def extract_all_text(reader: PdfReader) -> List[str]:
+# Section heading such as "1 Overview" or "2.3.4 Details", with an optional
+# trailing page number. Covers chapters and subsections in a single pass.
+# Whitespace is [^\S\n] so a match never runs onto the next line. The title
+# is a possessive run of non-digits, so a failed match never backtracks into
+# it; trailing whitespace is stripped from the title afterwards.
+_HEADING_RE = re.compile(
+    r"(?P<sid>\d++(?:\.\d++)*+)[^\S\n]++"
+    r"(?P<title>[A-Z][^0-9\n]++)(?:(?<=\s)\d++)?$",
+    re.MULTILINE
+)
+# Start of a line beginning with a digit, i.e. where a heading may start.
+# The literal newline prefix lets the regex engine skip ahead quickly.
+_HEADING_START_RE = re.compile(r"\n(?=\d)")
+
+# Start of the actual document content: a numbered chapter or section line
+# ("1 Overview", "2.3 Scope") or a "Chapter 1" label. A chapter line like
+# "1 Overview" and a "1.1 ..." line are special cases of the numbered form.
+# The numbered line is matched at the page start, then searched for after
+# a literal newline, which the regex engine can skip ahead to; a single
+# MULTILINE "^" pattern has to be tried at every character instead.
+_DOC_START_RE = re.compile(r"\d+(?:\.\d+)?\s+[A-Z]")
+_DOC_START_LINE_RE = re.compile(r"\n\d+(?:\.\d+)?\s+[A-Z]")
+_CHAPTER_ONE_RE = re.compile(r"(?i:Chapter)\s+1")
+
+# Page-based fallback titles: a plain title line, or a numbered subsection
+_PAGE_TITLE_RE = re.compile(r'^[A-Z][a-zA-Z\s\-\(\)\.]++$')
+_PAGE_SECTION_TITLE_RE = re.compile(r'^\d+\.\d+\s+[A-Z]')
+
+# Titles containing any of these are revision history or front matter, not
+# sections. Plain phrases are matched as lowercase substrings; only the
+# patterns that need regex features go through the regex engine.
+_REVISION_LITERALS = (
+    "initial release",
+    "including errata",
+    "editorial changes",
+    "revision version",
+    "this version incorporates",
+    "revision history",
+    "hex data",
+    "table of contents",
+    "list of figures",
+    "list of tables",
+)
+_REVISION_RE = re.compile(
+    r"\b(?:19|20)\d{2}\b"
+    r"|ECNs?:"
+    r"|Page \d+"
+    r"|Universal Serial Bus.*Specification",
+    re.IGNORECASE
+)
+
+# Deletes ASCII letters, so for ASCII titles len(title) - len(title.translate(...))
+# counts the letters in C
+_ALPHA_DELETE = str.maketrans("", "", string.ascii_letters)
+
+
+def extract_all_text(pdf_path: str, workers: Optional[int] = None) -> List[str]:
     """Extract text from all pages in the PDF.
     
+    Pages already extracted by an earlier run (of this script or of
+    parse_toc.py) on the same, unmodified PDF are loaded from the page
+    cache instead.
+    
     Args:
-        reader: PDF reader object
+        pdf_path: Path to the PDF file
+        workers: Number of worker processes (defaults to CPU count)
         
     Returns:
         List of text strings, one for each page
     """
-    texts: List[str] = []
-    total_pages = len(reader.pages)
-    print(f"📖 Extracting text from {total_pages} pages...")
-    
-    for i in range(total_pages):
-        if i % 50 == 0:  # Show progress every 50 pages
-            print(f"   Processing page {i+1}/{total_pages}...")
-        
-        try:
-            page_text = reader.pages[i].extract_text()
-            if page_text:
-                # Clean up problematic Unicode characters
-                page_text = (page_text.encode('utf-8', errors='replace')
-                           .decode('utf-8'))
-                texts.append(page_text)
-            else:
-                texts.append("")
-        except Exception as e:
-            print(f"Warning: Could not extract text from page {i+1}: {e}")
-            texts.append("")  # Add empty string for failed pages
-    
-    print(f"✅ Text extraction complete!")
+    print(f"📖 Extracting text from {pdf_path}...")
+    texts = load_or_extract_pages(pdf_path, workers=workers)
+    print(f"✅ Text extraction complete! ({len(texts)} pages)")
     return texts
 
 
@@ -53,62 +98,66 @@ def find_actual_document_start(pages: List[str]) -> int:
     """
     # Look for patterns that indicate the start of actual content
     for i, text in enumerate(pages):
-        # Look for chapter 1 or main content indicators
-        if re.search(r"^1\s+[A-Z][a-z]+", text, re.MULTILINE):
-            return i
-        if re.search(r"Chapter\s+1", text, re.IGNORECASE):
-            return i
-        if re.search(r"^1\.1\s+[A-Z]", text, re.MULTILINE):
-            return i
-        # Also look for any numbered section
-        if re.search(r"^\d+\.\d+\s+[A-Z]", text, re.MULTILINE):
-            return i
-        # Look for any content that looks like a section
-        if re.search(r"^\d+\s+[A-Z]", text, re.MULTILINE):
+        if (_DOC_START_RE.match(text) or _DOC_START_LINE_RE.search(text)
+                or _CHAPTER_ONE_RE.search(text)):
             return i
     return 5  # Very early start to capture more content
 
 
+@functools.lru_cache(maxsize=None)
+def numeric_key(sid: str) -> Tuple[int, ...]:
+    """Convert a section ID into a tuple of ints for numeric ordering.
+    
+    Results are cached, so find_headings and build_sections parse each
+    section ID only once between them.
+    
+    Args:
+        sid: Section ID (e.g., "2.10.1")
+        
+    Returns:
+        Tuple of integer components (e.g., (2, 10, 1))
+    """
+    return tuple(int(p) for p in sid.split("."))
+
+
+@functools.lru_cache(maxsize=4096)
 def is_valid_section_title(title: str) -> bool:
     """Check if a title is a valid section title.
     
+    Results are cached: a rejected heading does not mark its section ID
+    as seen, so the same rejected line (a revision table row, a repeated
+    label) is validated again every time it recurs.
+    
     Args:
         title: The title string to validate
         
     Returns:
         True if the title is valid, False otherwise
     """
+    # Checks run from cheapest to most expensive, so most rejects never
+    # reach the case-insensitive regex
+    
     # Must be meaningful
-    if len(title.strip()) < 1:  # Very permissive
+    if not title or title.isspace():  # Very permissive
         return False
     
-    # Must not be revision history
-    revision_patterns = [
-        r"\b(19|20)\d{2}\b",
-        r"Initial release",
-        r"Including errata",
-        r"Editorial changes",
-        r"Revision Version",
-        r"This version incorporates",
-        r"ECNs?:",
-        r"Page \d+",
-        r"Universal Serial Bus.*Specification",
-        r"Revision History",
-        r"hex data",
-        r"Table of Contents",
-        r"List of Figures",
-        r"List of Tables",
-    ]
-    
-    for pattern in revision_patterns:
-        if re.search(pattern, title, re.IGNORECASE):
-            return False
-    
     # Must be mostly alphabetic (very permissive)
-    alpha_chars = sum(1 for c in title if c.isalpha())
+    if title.isascii():
+        alpha_chars = len(title) - len(title.translate(_ALPHA_DELETE))
+    else:
+        # translate() only deletes ASCII letters; count the others one by one
+        alpha_chars = sum(c.isalpha() for c in title)
     if alpha_chars < len(title) * 0.2:  # Very low threshold
         return False
     
+    # Must not be revision history
+    lowered = title.lower()
+    for literal in _REVISION_LITERALS:
+        if literal in lowered:
+            return False
+    if _REVISION_RE.search(title):
+        return False
+    
     return True
 
 
@@ -123,83 +172,45 @@ def find_headings(pages: List[str]) -> List[Tuple[str, str, int]]:
     """
     start_page = find_actual_document_start(pages)
     findings: List[Tuple[str, str, int]] = []
+    seen_sids = set()
     
-    # Look for actual document sections starting from the identified start page
-    for idx, text in enumerate(pages[start_page:], start=start_page):
-        # Pattern 1: Main chapters "1 Overview", "2 Introduction"
-        chapter_pattern = re.compile(
-            r"^(?P<sid>\d+)\s+(?P<title>[A-Z][a-zA-Z\s\-\(\)\.]+?)(?:\s+\d+)?$", 
-            re.MULTILINE
-        )
-        for m in chapter_pattern.finditer(text):
-            sid = m.group("sid").strip()
-            title = m.group("title").strip()
-            
-            if is_valid_section_title(title):
-                findings.append((sid, title, idx + 1))
+    # Scan the pages from the identified start page as one text. Every page
+    # is preceded by a newline so each line start, including the first line
+    # of a page, is found by _HEADING_START_RE. page_offsets[i] is where
+    # page start_page + i begins in the joined text.
+    doc_pages = pages[start_page:]
+    joined = "\n" + "\n".join(doc_pages)
+    page_offsets = [1]
+    for text in doc_pages:
+        page_offsets.append(page_offsets[-1] + len(text) + 1)
+    
+    for line_start in _HEADING_START_RE.finditer(joined):
+        m = _HEADING_RE.match(joined, line_start.end())
+        if not m:
+            continue
         
-        # Pattern 2: Subsections "1.1 Introduction", "2.3.4 Details"
-        section_pattern = re.compile(
-            r"^(?P<sid>\d+(?:\.\d+)+)\s+"
-            r"(?P<title>[A-Z][a-zA-Z\s\-\(\)\.]+?)(?:\s+\d+)?$", 
-            re.MULTILINE
-        )
-        for m in section_pattern.finditer(text):
-            sid = m.group("sid").strip()
-            title = m.group("title").strip()
-            
-            if is_valid_section_title(title):
-                findings.append((sid, title, idx + 1))
+        sid = m.group("sid").strip()
         
-        # Pattern 3: More flexible pattern for subsections
-        flexible_pattern = re.compile(
-            r"^(?P<sid>\d+(?:\.\d+)*)\s+"
-            r"(?P<title>[A-Z][a-zA-Z\s\-\(\)\.]+?)(?:\s+\d+)?$", 
-            re.MULTILINE
-        )
-        for m in flexible_pattern.finditer(text):
-            sid = m.group("sid").strip()
-            title = m.group("title").strip()
-            
-            # Skip if already found or invalid
-            if any(f[0] == sid for f in findings):
-                continue
-            if not is_valid_section_title(title):
-                continue
-                
-            findings.append((sid, title, idx + 1))
+        # Keep the first (earliest page) occurrence of each section
+        if sid in seen_sids:
+            continue
         
-        # Pattern 4: Very flexible pattern for any numbered content
-        very_flexible_pattern = re.compile(
-            r"^(?P<sid>\d+(?:\.\d+)*)\s+"
-            r"(?P<title>[A-Z][^0-9\n]+?)(?:\s+\d+)?$", 
-            re.MULTILINE
-        )
-        for m in very_flexible_pattern.finditer(text):
-            sid = m.group("sid").strip()
-            title = m.group("title").strip()
-            
-            # Skip if already found or invalid
-            if any(f[0] == sid for f in findings):
-                continue
-            if not is_valid_section_title(title):
-                continue
-                
-            findings.append((sid, title, idx + 1))
-    
-    # Deduplicate and sort
-    seen = set()
-    unique: List[Tuple[str, str, int]] = []
-    for sid, title, page in sorted(
-        findings, 
-        key=lambda t: (list(map(int, t[0].split('.'))), t[2])
-    ):
-        if sid in seen:
+        title = m.group("title").strip()
+        if not is_valid_section_title(title):
             continue
-        seen.add(sid)
-        unique.append((sid, title, page))
+        
+        # Interned so build_sections' parent IDs share this object
+        sid = sys.intern(sid)
+        seen_sids.add(sid)
+        page = start_page + bisect.bisect_right(page_offsets, m.start())
+        findings.append((sid, title, page))
     
-    return unique
+    # Sort numerically by section ID. Findings are already unique per
+    # section ID, so the precomputed key alone decides the order.
+    decorated = [(numeric_key(sid), sid, title, page)
+                 for sid, title, page in findings]
+    decorated.sort()
+    return [(sid, title, page) for _, sid, title, page in decorated]
 
 
 def create_page_based_sections(pages: List[str], doc_title: str) -> List[SectionEntry]:
@@ -216,14 +227,18 @@ def create_page_based_sections(pages: List[str], doc_title: str) -> List[Section
     
     # Start from page 5 to skip front matter
     for page_num in range(5, len(pages)):
-        content = pages[page_num].strip()
+        raw = pages[page_num]
         
-        # Skip empty or very short pages
+        # Skip empty or very short pages; stripping can only shorten a page,
+        # so check the raw length before copying it
+        if len(raw) < 50:
+            continue
+        content = raw.strip()
         if len(content) < 50:
             continue
             
         # Extract a title from the first line or create one
-        lines = content.split('\n')
+        lines = content.split('\n', 5)
         title = "Page Content"
         
         # Try to find a meaningful title
@@ -231,10 +246,7 @@ def create_page_based_sections(pages: List[str], doc_title: str) -> List[Section
             line = line.strip()
             if len(line) > 10 and len(line) < 100:
                 # Check if it looks like a title
-                if re.match(r'^[A-Z][a-zA-Z\s\-\(\)\.]+$', line):
-                    title = line
-                    break
-                elif re.match(r'^\d+\.\d+\s+[A-Z]', line):
+                if _PAGE_TITLE_RE.match(line) or _PAGE_SECTION_TITLE_RE.match(line):
                     title = line
                     break
         
@@ -249,7 +261,6 @@ def create_page_based_sections(pages: List[str], doc_title: str) -> List[Section
                 page=page_num + 1,
                 level=1,
                 parent_id=None,
-                full_path=f"{section_id} {title}",
                 content=content,
                 tags=["page_content"],
             )
@@ -259,13 +270,17 @@ def create_page_based_sections(pages: List[str], doc_title: str) -> List[Section
 
 
 def build_sections(pages: List[str], headings: List[Tuple[str, str, int]], 
-                  doc_title: str) -> List[SectionEntry]:
+                  doc_title: str,
+                  section_ids: Optional[AbstractSet[str]] = None) -> List[SectionEntry]:
     """Build SectionEntry objects from headings and page content.
     
     Args:
         pages: List of page text strings
         headings: List of (section_id, title, page_number) tuples
         doc_title: Title of the document
+        section_ids: If given, only build entries for these section IDs.
+            Other headings still end the content of the section before them,
+            but their content is never sliced out of the page text.
         
     Returns:
         List of SectionEntry objects with content extracted from pages
@@ -273,13 +288,24 @@ def build_sections(pages: List[str], headings: List[Tuple[str, str, int]],
     entries: List[SectionEntry] = []
     num_pages = len(pages)
 
-    # Sort headings by page and section ID
-    def numeric_key(sid: str) -> Tuple[int, ...]:
-        return tuple(int(p) for p in sid.split("."))
+    # Join all pages once; each section's content is then a single slice.
+    # page_offsets[i] is where page i starts in full_text, and
+    # page_offsets[num_pages] sits one separator past the end of the text.
+    full_text = "\n\n".join(pages)
+    page_offsets = [0]
+    for page_text in pages:
+        page_offsets.append(page_offsets[-1] + len(page_text) + 2)
 
-    headings_sorted = sorted(headings, key=lambda h: (h[2], numeric_key(h[0])))
+    # Sort headings by page and section ID, parsing each section ID once
+    decorated = [((page, numeric_key(sid)), (sid, title, page))
+                 for sid, title, page in headings]
+    decorated.sort(key=lambda d: d[0])
+    headings_sorted = [heading for _, heading in decorated]
 
     for idx, (sid, title, page_start) in enumerate(headings_sorted):
+        if section_ids is not None and sid not in section_ids:
+            continue
+
         if idx + 1 < len(headings_sorted):
             next_page = headings_sorted[idx + 1][2]
             page_end = max(page_start, next_page - 1)
@@ -290,12 +316,23 @@ def build_sections(pages: List[str], headings: List[Tuple[str, str, int]],
         page_start = max(1, min(page_start, num_pages))
         page_end = max(1, min(page_end, num_pages))
 
-        # Get content for this section
-        content_pages = pages[page_start - 1 : page_end]
-        content = ("\n\n".join(content_pages)).strip()
+        # Get content for this section (pages page_start..page_end inclusive).
+        # Surrounding whitespace is trimmed by moving the bounds inward, so
+        # the content is copied out of full_text once, already stripped.
+        start, end = 0, 0
+        if num_pages:
+            start = page_offsets[page_start - 1]
+            end = page_offsets[page_end] - 2
+            while start < end and full_text[start].isspace():
+                start += 1
+            while end > start and full_text[end - 1].isspace():
+                end -= 1
+        content = full_text[start:end]
 
+        # Level and parent come straight from the dots, with no split list
         level = sid.count(".") + 1
-        parent_id = ".".join(sid.split(".")[:-1]) if "." in sid else None
+        head, sep, _ = sid.rpartition(".")
+        parent_id = sys.intern(head) if sep else None
 
         entries.append(
             SectionEntry(
@@ -305,7 +342,6 @@ def build_sections(pages: List[str], headings: List[Tuple[str, str, int]],
                 page=page_start,
                 level=level,
                 parent_id=parent_id,
-                full_path=f"{sid} {title}",
                 content=content,
                 tags=[],
             )
@@ -313,26 +349,6 @@ def build_sections(pages: List[str], headings: List[Tuple[str, str, int]],
     return entries
 
 
-def get_document_title(reader: PdfReader) -> str:
-    """Extract document title from PDF metadata.
-    
-    Args:
-        reader: PDF reader object
-        
-    Returns:
-        Document title string, defaults to "USB Power Delivery Specification" if not found
-    """
-    doc_title = "USB Power Delivery Specification"
-    try:
-        if reader.metadata and reader.metadata.title:
-            doc_title = str(reader.metadata.title)
-    except Exception as e:
-        # Log the error but continue with default title
-        print(f"Warning: Could not extract document title: {e}")
-    
-    return doc_title
-
-
 def main() -> None:
     """Main function to parse document sections from PDF and save as JSONL.
     
@@ -364,15 +380,16 @@ def main() -> None:
         return
     
     try:
-        reader = PdfReader(pdf_path)
+        pdf = load_pdf_document(pdf_path)
     except Exception as e:
         print(f"❌ Error: Could not read PDF file '{pdf_path}': {e}")
         print("Please check if the PDF file is valid and not corrupted.")
         return
 
     try:
-        doc_title = get_document_title(reader)
-        pages = extract_all_text(reader)
+        doc_title = get_document_title(pdf)
+        pdf.close()
+        pages = extract_all_text(pdf_path)
     except Exception as e:
         print(f"❌ Error: Could not extract text from PDF: {e}")
         print("The PDF might have complex formatting or be corrupted.")
@@ -385,16 +402,10 @@ def main() -> None:
         print(f"   Found {len(headings)} headings")
         
         print("🏗️ Building structured sections...")
-        all_sections = build_sections(pages, headings, doc_title)
-        print(f"   Built {len(all_sections)} structured sections")
-        
-        # Filter sections to only include those in TOC
-        filtered_sections = []
-        for section in all_sections:
-            if section.section_id in toc_section_ids:
-                filtered_sections.append(section)
-        
-        print(f"📋 Filtered to {len(filtered_sections)} sections matching TOC")
+        # Only sections in the TOC are kept, so only their content is built
+        filtered_sections = build_sections(pages, headings, doc_title,
+                                           section_ids=toc_section_ids)
+        print(f"📋 Built {len(filtered_sections)} sections matching TOC")
         
         # If we don't have enough sections, try page-based approach
         if len(filtered_sections) < len(toc_entries) * 0.8:  # At least 80% coverage
@@ -422,11 +433,7 @@ def main() -> None:
             print(f"Using structured approach: {len(sections)} sections")
 
         print("💾 Writing sections to file...")
-        with open("usb_pd_spec.jsonl", "w", encoding="utf-8") as f:
-            for entry in sections:
-                # Ensure proper Unicode handling
-                json_str = json.dumps(asdict(entry), ensure_ascii=False, separators=(',', ':'))
-                f.write(json_str + "\n")
+        write_jsonl("usb_pd_spec.jsonl", sections)
 
         print(f"✅ Wrote {len(sections)} sections to usb_pd_spec.jsonl")
         print(f"📊 Coverage: {len(sections)}/{len(toc_entries)} = {(len(sections)/len(toc_entries)*100):.1f}%")
@@ -1,13 +1,16 @@
-import json
 import re
-from dataclasses import asdict
+import sys
 from typing import List, Optional, Tuple
 
-from pypdf import PdfReader
-from base_models import TocEntry
+import pypdfium2 as pdfium
+from base_models import TocEntry, write_jsonl
+from pdf_text import get_document_title, load_or_extract_pages, load_pdf_document
 
 
-DOC_TITLE_DEFAULT = "USB Power Delivery Specification"
+# Dot leaders (.....) in raw titles
+_DOT_LEADER_RE = re.compile(r"\.{2,}")
+# Years in titles usually mark revision history rows
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
 
 
 def normalize_title(raw_title: str) -> str:
@@ -19,11 +22,17 @@ def normalize_title(raw_title: str) -> str:
     Returns:
         Cleaned title string with dot leaders and extra whitespace removed
     """
-    title = raw_title.strip()
-    # Replace dot leaders (.....) and excessive whitespace
-    title = re.sub(r"\.{2,}", " ", title)
-    title = re.sub(r"\s+", " ", title)
-    return title.strip(" .")
+    # Drop the trailing dot leader with plain rstrips; the loop only runs
+    # when other whitespace (tabs, newlines) is mixed into the trailer
+    title = raw_title.rstrip(" .")
+    while title[-1:].isspace():
+        title = title.rstrip().rstrip(" .")
+    # Replace any dot leaders left inside the title, skipping the regex
+    # when there are none
+    if ".." in title:
+        title = _DOT_LEADER_RE.sub(" ", title)
+    # split() drops leading/trailing whitespace and collapses inner runs
+    return " ".join(title.split()).strip(" .")
 
 
 def infer_parent_id(section_id: str) -> Optional[str]:
@@ -35,27 +44,173 @@ def infer_parent_id(section_id: str) -> Optional[str]:
     Returns:
         Parent section ID (e.g., "2.1") or None if top-level
     """
-    return ".".join(section_id.split(".")[:-1]) if "." in section_id else None
+    # One rpartition call, rather than splitting and re-joining the parts.
+    # Parents are interned so they share one object with the section's ID.
+    head, sep, _ = section_id.rpartition(".")
+    return sys.intern(head) if sep else None
 
 
-def find_toc_text(reader: PdfReader, max_scan_pages: int = 100) -> Tuple[str, int]:
+def split_toc_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """Split a ToC line like "2.1.3 Title .......... 54" into its parts.
+    
+    The page is the last whitespace-separated number on the line and the
+    title is everything between the section ID and the page. Plain string
+    checks reject most non-ToC lines on their first character, which is
+    cheaper than running a regex over every line.
+    
+    Args:
+        line: A single line of text, without its newline
+        
+    Returns:
+        Tuple of (section_id, raw_title, page_str), or None if the line
+        is not a ToC entry
+    """
+    line = line.strip()
+    if not line[:1].isdecimal():
+        return None
+    
+    parts = line.rsplit(None, 1)
+    if len(parts) < 2 or not parts[1].isdecimal():
+        return None
+    page_str = parts[1]
+    
+    head = line[:len(line) - len(page_str)]
+    sec_id = head.split(None, 1)[0]
+    raw_title = head[len(sec_id):]
+    # Need a separator after the section ID plus a title ending in whitespace
+    if len(raw_title) < 2 or not is_section_id(sec_id):
+        return None
+    
+    return sec_id, raw_title, page_str
+
+
+def is_section_id(sec_id: str) -> bool:
+    """Check that a token is a dot-separated numeric section ID like "2.1.3".
+    
+    Args:
+        sec_id: Candidate section ID
+        
+    Returns:
+        True if the token is one or more dot-separated numbers
+    """
+    return sec_id.replace(".", "").isdecimal() and "" not in sec_id.split(".")
+
+
+def get_printed_page_number(pdf: pdfium.PdfDocument, page_index: int) -> int:
+    """Return the page number printed on a page, as a ToC would cite it.
+    
+    The number comes from the PDF's page labels. Pages without a numeric
+    label (no labels at all, or roman front matter) fall back to their
+    one-based physical position, which is what PDF viewers show.
+    
+    Args:
+        pdf: PDFium document object
+        page_index: Zero-based index of the page
+        
+    Returns:
+        Printed page number
+    """
+    label = pdf.get_page_label(page_index)
+    return int(label) if label.isdecimal() else page_index + 1
+
+
+def parse_outline_entries(pdf: pdfium.PdfDocument, doc_title: str) -> List[TocEntry]:
+    """Build ToC entries from the PDF's bookmark (outline) tree.
+    
+    Bookmarks are read straight from the document structure, so no page
+    text has to be extracted. Only bookmarks titled with a numbered
+    section ("2.1.3 Title") are kept. The page is the printed page number
+    of the bookmark's target, so it means the same as a page read from
+    the ToC text.
+    
+    Args:
+        pdf: PDFium document object
+        doc_title: Title of the document
+        
+    Returns:
+        List of TocEntry objects, empty if the PDF has no usable outline
+    """
+    entries: List[TocEntry] = []
+    seen_section_ids = set()
+
+    for bookmark in pdf.get_toc():
+        parts = bookmark.get_title().split(None, 1)
+        if len(parts) < 2 or not is_section_id(parts[0]):
+            continue
+        sec_id = parts[0]
+
+        dest = bookmark.get_dest()
+        page_index = dest.get_index() if dest is not None else None
+        if page_index is None:
+            continue
+
+        title = normalize_title(parts[1])
+        if not title or _YEAR_RE.search(title):
+            continue
+
+        if sec_id in seen_section_ids:
+            continue
+        sec_id = sys.intern(sec_id)
+        seen_section_ids.add(sec_id)
+
+        entries.append(
+            TocEntry(
+                doc_title=doc_title,
+                section_id=sec_id,
+                title=title,
+                page=get_printed_page_number(pdf, page_index),
+                level=sec_id.count(".") + 1,
+                parent_id=infer_parent_id(sec_id),
+                tags=[],
+            )
+        )
+
+    return entries
+
+
+def select_toc_entries(outline_entries: List[TocEntry],
+                       text_entries: List[TocEntry]) -> List[TocEntry]:
+    """Choose between the bookmark entries and the entries from the ToC text.
+    
+    Bookmarks are preferred, but some PDFs only bookmark chapters or part
+    of the tree. The ToC text is used instead when the outline is clearly
+    less complete: it has no subsections while the ToC text does, or it
+    has fewer than 80% of the ToC text's entries.
+    
+    Args:
+        outline_entries: Entries from parse_outline_entries
+        text_entries: Entries from parse_toc_entries
+        
+    Returns:
+        The more complete list of entries
+    """
+    if not outline_entries:
+        return text_entries
+    
+    chapters_only = (all(e.level == 1 for e in outline_entries)
+                     and any(e.level > 1 for e in text_entries))
+    if chapters_only or len(outline_entries) < len(text_entries) * 0.8:
+        return text_entries
+    return outline_entries
+
+
+def find_toc_text(pdf_path: str, max_scan_pages: int = 100,
+                  workers: Optional[int] = None) -> Tuple[str, int]:
     """Extract text from the first N pages as the likely ToC region.
     
+    Pages come from the shared page cache, so the extraction done here
+    is reused by parse_sections.py.
+    
     Args:
-        reader: PDF reader object
+        pdf_path: Path to the PDF file
         max_scan_pages: Maximum number of pages to scan for ToC
+        workers: Number of worker processes (defaults to CPU count)
         
     Returns:
         Tuple of (concatenated text, total number of pages in PDF)
     """
-    num_pages = len(reader.pages)
-    max_scan_pages = min(max_scan_pages, num_pages)
-
-    collected_text: List[str] = []
-    for i in range(max_scan_pages):
-        page_text = reader.pages[i].extract_text() or ""
-        collected_text.append(page_text)
-    return ("\n".join(collected_text), num_pages)
+    pages = load_or_extract_pages(pdf_path, workers=workers)
+    return ("\n".join(pages[:max_scan_pages]), len(pages))
 
 
 def parse_toc_entries(toc_text: str, num_pages: int, doc_title: str) -> List[TocEntry]:
@@ -69,20 +224,15 @@ def parse_toc_entries(toc_text: str, num_pages: int, doc_title: str) -> List[Toc
     Returns:
         List of TocEntry objects representing the parsed table of contents
     """
-    # Match lines like: 2.1.3 Title .......... 54
     # Capture the last integer as page, ensure it is within the PDF page count.
-    pattern = re.compile(
-        r"^\s*(?P<sid>\d+(?:\.\d+)*)\s+"
-        r"(?P<title>.*?)\s+(?P<page>\d+)\s*$", 
-        re.MULTILINE
-    )
     entries: List[TocEntry] = []
     seen_section_ids = set()
 
-    for match in pattern.finditer(toc_text):
-        sec_id = match.group("sid").strip()
-        raw_title = match.group("title")
-        page_str = match.group("page")
+    for line in toc_text.split("\n"):
+        parts = split_toc_line(line)
+        if parts is None:
+            continue
+        sec_id, raw_title, page_str = parts
 
         # Page sanity check
         page_num = int(page_str)
@@ -93,7 +243,7 @@ def parse_toc_entries(toc_text: str, num_pages: int, doc_title: str) -> List[Toc
 
         # Basic guardrails to avoid revision history rows, 
         # which often include dates
-        if re.search(r"\b(19|20)\d{2}\b", title):
+        if _YEAR_RE.search(title):
             continue
 
         level = sec_id.count(".") + 1
@@ -101,6 +251,8 @@ def parse_toc_entries(toc_text: str, num_pages: int, doc_title: str) -> List[Toc
 
         if sec_id in seen_section_ids:
             continue
+        # Interned so the ID and its children's parent_id are one object
+        sec_id = sys.intern(sec_id)
         seen_section_ids.add(sec_id)
 
         entries.append(
@@ -111,7 +263,6 @@ def parse_toc_entries(toc_text: str, num_pages: int, doc_title: str) -> List[Toc
                 page=page_num,
                 level=level,
                 parent_id=parent_id,
-                full_path=f"{sec_id} {title}",
                 tags=[],
             )
         )
@@ -119,44 +270,31 @@ def parse_toc_entries(toc_text: str, num_pages: int, doc_title: str) -> List[Toc
     return entries
 
 
-def get_document_title(reader: PdfReader) -> str:
-    """Extract document title from PDF metadata.
-    
-    Args:
-        reader: PDF reader object
-        
-    Returns:
-        Document title string, defaults to DOC_TITLE_DEFAULT if not found
-    """
-    doc_title = DOC_TITLE_DEFAULT
-    try:
-        if reader.metadata and reader.metadata.title:
-            doc_title = str(reader.metadata.title)
-    except Exception as e:
-        # Log the error but continue with default title
-        print(f"Warning: Could not extract document title: {e}")
-    
-    return doc_title
-
-
 def main() -> None:
     """Main function to extract Table of Contents from PDF and save as JSONL.
     
-    Reads the USB PD specification PDF, extracts the table of contents,
-    parses it into structured entries, and saves the result to usb_pd_toc.jsonl.
+    Reads the USB PD specification PDF, takes the table of contents from its
+    bookmarks or, when they are missing or incomplete, from the ToC pages,
+    and saves the structured entries to usb_pd_toc.jsonl.
     """
     pdf_path = "usb_pd_spec.pdf"
-    reader = PdfReader(pdf_path)
-    toc_text, num_pages = find_toc_text(reader, max_scan_pages=120)
 
-    # Determine document title
-    doc_title = get_document_title(reader)
+    # Determine document title and read the bookmark tree
+    pdf = load_pdf_document(pdf_path)
+    try:
+        doc_title = get_document_title(pdf)
+        outline_entries = parse_outline_entries(pdf, doc_title)
+    finally:
+        pdf.close()
 
-    toc_entries = parse_toc_entries(toc_text, num_pages, doc_title)
+    # The ToC pages are parsed as well, to catch an outline that only
+    # covers part of the tree; their text lands in the page cache that
+    # parse_sections.py reads anyway
+    toc_text, num_pages = find_toc_text(pdf_path, max_scan_pages=120)
+    text_entries = parse_toc_entries(toc_text, num_pages, doc_title)
+    toc_entries = select_toc_entries(outline_entries, text_entries)
 
-    with open("usb_pd_toc.jsonl", "w", encoding="utf-8") as f:
-        for entry in toc_entries:
-            f.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+    write_jsonl("usb_pd_toc.jsonl", toc_entries)
 
     print(f"✅ Extracted {len(toc_entries)} TOC entries into usb_pd_toc.jsonl")
 
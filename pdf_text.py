@@ -0,0 +1,221 @@
+"""PDF text extraction helpers shared by the parsers and the validator.
+
+Text is extracted with PDFium (via pypdfium2), which is much faster than
+pure-Python extraction. Large page ranges are split across worker processes.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+import pypdfium2 as pdfium
+
+
+DOC_TITLE_DEFAULT = "USB Power Delivery Specification"
+# Extracted page texts, shared by the parsers and the validator across runs
+PAGE_CACHE_PATH = "usb_pd_pages.pkl"
+# Part of the page cache key; bump it whenever extract_page_text() changes
+# the text it returns, so caches written by older code are not reused
+PAGE_CACHE_VERSION = 1
+
+
+def load_pdf_document(pdf_path: str) -> pdfium.PdfDocument:
+    """Open a PDF with PDFium from its path.
+    
+    PDFium reads only the parts of the file it needs, so reading the
+    title, the outline or the page count does not load the whole PDF,
+    and processes opening the same file share the OS page cache.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        
+    Returns:
+        PDFium document object
+    """
+    return pdfium.PdfDocument(pdf_path)
+
+
+def get_document_title(pdf: pdfium.PdfDocument) -> str:
+    """Extract document title from PDF metadata.
+    
+    Args:
+        pdf: PDFium document object
+        
+    Returns:
+        Document title string, defaults to DOC_TITLE_DEFAULT if not found
+    """
+    doc_title = DOC_TITLE_DEFAULT
+    try:
+        title = pdf.get_metadata_value("Title")
+        if title:
+            doc_title = title
+    except Exception as e:
+        # Log the error but continue with default title
+        print(f"Warning: Could not extract document title: {e}")
+    
+    return doc_title
+
+
+def extract_page_text(pdf: pdfium.PdfDocument, page_index: int) -> str:
+    """Extract cleaned text from a single page.
+    
+    Args:
+        pdf: PDFium document object
+        page_index: Zero-based index of the page
+        
+    Returns:
+        Page text, or an empty string if extraction fails
+    """
+    try:
+        page = pdf[page_index]
+        textpage = page.get_textpage()
+        page_text = textpage.get_text_range()
+        textpage.close()
+        page.close()
+    except Exception as e:
+        print(f"Warning: Could not extract text from page {page_index+1}: {e}")
+        return ""  # Empty string for failed pages
+    
+    if not page_text:
+        return ""
+    # PDFium separates lines with CRLF; the parsers' patterns expect LF
+    page_text = page_text.replace("\r\n", "\n")
+    # Clean up problematic Unicode characters
+    return page_text.encode('utf-8', errors='replace').decode('utf-8')
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """Extract text for pages [start, end) in a worker process.
+    
+    Each worker opens its own document, since PDFium handles cannot be
+    pickled or shared between processes.
+    """
+    pdf = load_pdf_document(pdf_path)
+    try:
+        return [extract_page_text(pdf, i) for i in range(start, end)]
+    finally:
+        pdf.close()
+
+
+def extract_pages(pdf_path: str, workers: Optional[int] = None) -> List[str]:
+    """Extract text from every page of a PDF.
+    
+    Pages are split into contiguous ranges and extracted in parallel
+    worker processes. PDFium is not thread-safe, so processes are used
+    rather than threads.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Number of worker processes (defaults to CPU count)
+        
+    Returns:
+        List of text strings, one for each page
+    """
+    pdf = load_pdf_document(pdf_path)
+    total_pages = len(pdf)
+    workers = min(workers or os.cpu_count() or 1, total_pages)
+    
+    if workers <= 1:
+        try:
+            return [extract_page_text(pdf, i) for i in range(total_pages)]
+        finally:
+            pdf.close()
+    pdf.close()
+    
+    chunk_size = -(-total_pages // workers)  # Ceiling division
+    texts: List[str] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_extract_page_range, pdf_path, start,
+                            min(start + chunk_size, total_pages))
+            for start in range(0, total_pages, chunk_size)
+        ]
+        # Collect in submission order so page order is preserved
+        for future in futures:
+            texts.extend(future.result())
+    return texts
+
+
+def file_digest(path: str) -> str:
+    """Return a BLAKE2b digest of a file's contents, as hex.
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Hex digest identifying the file's bytes
+    """
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(
+            fh, lambda: hashlib.blake2b(digest_size=16)
+        ).hexdigest()
+
+
+def load_cached_pages(pdf_path: str, cache_path: str,
+                      extract: Callable[[str], List[str]],
+                      version: int = PAGE_CACHE_VERSION) -> List[str]:
+    """Return page texts from a cache keyed by the PDF's content hash.
+    
+    The cache is only used while the PDF's bytes and the extractor
+    version are unchanged, whatever the PDF's path or modification time.
+    Otherwise extract(pdf_path) is run and the cache is rewritten. The
+    new cache is written to a temporary file and moved into place, so an
+    interrupted or concurrent run never leaves a truncated cache behind.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        cache_path: Path of the pickled page cache
+        extract: Function returning the page texts of a PDF path
+        version: Version of the extractor's output format
+        
+    Returns:
+        List of text strings, one for each page
+    """
+    key = (version, file_digest(pdf_path))
+    
+    try:
+        with open(cache_path, "rb") as fh:
+            cached_key, pages = pickle.load(fh)
+        if cached_key == key:
+            return pages
+    except Exception:
+        # Missing, damaged or foreign cache; unpickling can fail in many
+        # ways, and the answer is always to extract again below
+        pass
+    
+    pages = extract(pdf_path)
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(cache_path)), suffix=".tmp"
+        )
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump((key, pages), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not write page cache '{cache_path}': {e}")
+    finally:
+        # Left over only if writing or moving the new cache failed
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return pages
+
+
+def load_or_extract_pages(pdf_path: str, cache_path: str = PAGE_CACHE_PATH,
+                          workers: Optional[int] = None) -> List[str]:
+    """Return the text of every page, reusing a cache from an earlier run.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        cache_path: Path of the pickled page cache
+        workers: Number of worker processes for a fresh extraction
+        
+    Returns:
+        List of text strings, one for each page
+    """
+    return load_cached_pages(
+        pdf_path, cache_path, lambda path: extract_pages(path, workers=workers)
+    )
@@ -1,7 +1,8 @@
 import unittest
 import json
 import os
-from base_models import TocEntry, SectionEntry
+import tempfile
+from base_models import TocEntry, SectionEntry, write_jsonl
 from parse_toc import normalize_title, infer_parent_id
 
 
@@ -40,7 +41,6 @@ class TestBasicFunctionality(unittest.TestCase):
             page=53,
             level=3,
             parent_id="2.1",
-            full_path="2.1.2 Contract Negotiation",
             tags=["negotiation", "contracts"]
         )
         
@@ -65,7 +65,6 @@ class TestBasicFunctionality(unittest.TestCase):
             page=53,
             level=3,
             parent_id="2.1",
-            full_path="2.1.2 Contract Negotiation",
             content="This is the content of the section.",
             tags=["negotiation", "contracts"]
         )
@@ -87,6 +86,52 @@ class TestBasicFunctionality(unittest.TestCase):
         self.assertEqual(entry.get_content_length(), 35)
         self.assertTrue(entry.has_content())
     
+    def test_full_path_and_to_dict(self):
+        """Test computed full_path and dictionary conversion."""
+        entry = SectionEntry(
+            doc_title="USB PD Spec",
+            section_id="2.1.2",
+            title="Contract Negotiation",
+            page=53,
+            level=3,
+            parent_id="2.1",
+            content="Section content.",
+            tags=[]
+        )
+        
+        self.assertEqual(entry.full_path, "2.1.2 Contract Negotiation")
+        
+        data = entry.to_dict()
+        self.assertEqual(list(data), [
+            "doc_title", "section_id", "title", "page", "level",
+            "parent_id", "full_path", "tags", "content"
+        ])
+        self.assertEqual(data["full_path"], "2.1.2 Contract Negotiation")
+        
+        # Entries are immutable value objects
+        with self.assertRaises(AttributeError):
+            entry.title = "Other"
+    
+    def test_write_jsonl(self):
+        """Test that entries are written one compact JSON object per line."""
+        entries = [
+            TocEntry(doc_title="USB PD Spec", section_id="1", title="Überblick",
+                     page=1, level=1, parent_id=None, tags=[]),
+            TocEntry(doc_title="USB PD Spec", section_id="1.1", title="Scope",
+                     page=2, level=2, parent_id="1", tags=["intro"]),
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "toc.jsonl")
+            write_jsonl(path, entries)
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        
+        self.assertEqual(lines[-1], "")  # Trailing newline after the last row
+        self.assertEqual([json.loads(line) for line in lines[:-1]],
+                         [entry.to_dict() for entry in entries])
+        self.assertIn('"title":"Überblick"', lines[0])
+    
     def test_inheritance_functionality(self):
         """Test that inheritance works correctly."""
         # Test TocEntry inheritance
@@ -97,7 +142,6 @@ class TestBasicFunctionality(unittest.TestCase):
             page=1,
             level=1,
             parent_id=None,
-            full_path="1 Test Title",
             tags=[]
         )
         
@@ -109,7 +153,6 @@ class TestBasicFunctionality(unittest.TestCase):
             page=2,
             level=2,
             parent_id="1",
-            full_path="1.1 Test Section",
             content="Test content",
             tags=[]
         )
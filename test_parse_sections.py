@@ -31,6 +31,11 @@ class TestParseSections(unittest.TestCase):
         self.assertFalse(is_valid_section_title("Revision History"))
         self.assertFalse(is_valid_section_title("Initial release"))
         self.assertFalse(is_valid_section_title("2024-10"))
+        
+        # Non-ASCII letters count as letters
+        self.assertTrue(is_valid_section_title("ΩΩΩΩ"))
+        self.assertTrue(is_valid_section_title("ÄÖÜ ßß"))
+        self.assertFalse(is_valid_section_title("€ 1234567890"))
     
     def test_find_headings(self):
         """Test finding section headings."""
@@ -51,7 +56,56 @@ class TestParseSections(unittest.TestCase):
         self.assertEqual(first_heading[0], "1")  # section_id
         self.assertEqual(first_heading[1], "Overview")  # title
         self.assertEqual(first_heading[2], 1)  # page index
-    
+
+    def test_find_headings_keeps_first_occurrence(self):
+        """Test that a repeated section ID keeps its earliest page."""
+        pages = [
+            "1 Overview",
+            "1.1 Introduction",
+            "1.1 Introduction, continued",
+            "2 Power Delivery"
+        ]
+
+        headings = find_headings(pages)
+        section_ids = [h[0] for h in headings]
+        self.assertEqual(section_ids, ["1", "1.1", "2"])
+        self.assertEqual(headings[1], ("1.1", "Introduction", 2))
+
+    def test_find_headings_long_title(self):
+        """Test that a heading line is matched however long its title is."""
+        long_title = "Overview " + "of the specification " * 15
+        pages = [
+            "1 " + long_title,
+            "1 Overview ......."
+        ]
+
+        headings = find_headings(pages)
+        self.assertEqual(headings, [("1", long_title.strip(), 1)])
+
+    def test_find_headings_numeric_order(self):
+        """Test that headings are ordered numerically, not lexically."""
+        pages = [
+            "1 Overview",
+            "1.10 Glossary",
+            "1.9 Scope",
+            "1.2 Terms"
+        ]
+
+        headings = find_headings(pages)
+        section_ids = [h[0] for h in headings]
+        self.assertEqual(section_ids, ["1", "1.2", "1.9", "1.10"])
+
+    def test_find_headings_does_not_span_pages(self):
+        """Test that a bare number at a page end is not joined to the next page."""
+        pages = [
+            "1 Overview\nOverview text.\n12",
+            "Power Delivery text.",
+            "1.1 Introduction"
+        ]
+
+        headings = find_headings(pages)
+        self.assertEqual(headings, [("1", "Overview", 1), ("1.1", "Introduction", 3)])
+
     def test_build_sections(self):
         """Test building sections from headings."""
         pages = [
@@ -109,6 +163,39 @@ class TestParseSections(unittest.TestCase):
         # Second section should have content from page 3
         self.assertIn("Power Delivery content", sections[1].content)
 
+    def test_build_sections_filtered_by_section_ids(self):
+        """Test that only requested sections are built, with unchanged bounds."""
+        pages = [
+            "Page 1: Overview content",
+            "Page 2: Scope content",
+            "Page 3: Power Delivery content"
+        ]
+        
+        headings = [
+            ("1", "Overview", 1),
+            ("1.1", "Scope", 2),
+            ("2", "Power Delivery", 3)
+        ]
+        
+        sections = build_sections(pages, headings, "USB PD Spec",
+                                  section_ids={"1", "2"})
+        
+        self.assertEqual([s.section_id for s in sections], ["1", "2"])
+        # "1.1" is skipped but still ends the content of section "1"
+        self.assertEqual(sections[0].content, "Page 1: Overview content")
+        self.assertEqual(sections[1].content, "Page 3: Power Delivery content")
+
+    def test_build_sections_strips_content(self):
+        """Test that section content is stripped of surrounding whitespace."""
+        pages = ["\n  1 Overview\nText  \n", "  \n", " 2 Scope \t\n"]
+        headings = [("1", "Overview", 1), ("2", "Scope", 3)]
+        
+        sections = build_sections(pages, headings, "USB PD Spec")
+        
+        self.assertEqual(sections[0].content, "\n\n".join(pages[:2]).strip())
+        self.assertEqual(sections[1].content, "2 Scope")
+        self.assertEqual(build_sections(["  "], [("1", "Overview", 1)], "USB PD Spec")[0].content, "")
+
 
 class TestSectionEntry(unittest.TestCase):
     
@@ -121,7 +208,6 @@ class TestSectionEntry(unittest.TestCase):
             page=53,
             level=3,
             parent_id="2.1",
-            full_path="2.1.2 Contract Negotiation",
             content="This is the content of the section.",
             tags=["negotiation", "contracts"]
         )
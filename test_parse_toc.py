@@ -1,7 +1,14 @@
 import unittest
 import json
 import os
-from parse_toc import TocEntry, normalize_title, infer_parent_id, parse_toc_entries
+import io
+
+import pypdfium2 as pdfium
+from pypdf import PdfWriter
+from parse_toc import (TocEntry, normalize_title, infer_parent_id, parse_toc_entries,
+                       split_toc_line, parse_outline_entries, select_toc_entries)
+from pdf_text import extract_page_text
+from test_pdf_text import add_text_page
 
 
 class TestParseToc(unittest.TestCase):
@@ -29,6 +36,20 @@ class TestParseToc(unittest.TestCase):
         # Test top-level section
         self.assertIsNone(infer_parent_id("1"))
         self.assertIsNone(infer_parent_id("2"))
+    
+    def test_split_toc_line(self):
+        """Test splitting a ToC line into section ID, title and page."""
+        sid, raw_title, page = split_toc_line("  2.1.3 Title .......... 54 ")
+        self.assertEqual(sid, "2.1.3")
+        self.assertEqual(normalize_title(raw_title), "Title")
+        self.assertEqual(page, "54")
+        
+        # Non-ToC lines
+        self.assertIsNone(split_toc_line("Overview .......... 10"))
+        self.assertIsNone(split_toc_line("1 Overview"))
+        self.assertIsNone(split_toc_line("1 Overview10"))
+        self.assertIsNone(split_toc_line("1. Overview 10"))
+        self.assertIsNone(split_toc_line("1 10"))
 
 
 class TestTocEntry(unittest.TestCase):
@@ -42,7 +63,6 @@ class TestTocEntry(unittest.TestCase):
             page=53,
             level=3,
             parent_id="2.1",
-            full_path="2.1.2 Contract Negotiation",
             tags=["negotiation", "contracts"]
         )
         
@@ -99,6 +119,87 @@ class TestIntegration(unittest.TestCase):
         self.assertEqual(subsection.level, 2)
         self.assertEqual(subsection.parent_id, "1")
 
+    def test_parse_toc_entries_single_line(self):
+        """Test that an entry is never assembled from two lines."""
+        mock_toc_text = "1 Overview\n10\n2 Power Delivery .......... 20\n"
+        
+        entries = parse_toc_entries(mock_toc_text, 50, "USB PD Spec")
+        
+        self.assertEqual([e.section_id for e in entries], ["2"])
+        self.assertEqual(entries[0].title, "Power Delivery")
+        self.assertEqual(entries[0].page, 20)
+
+    def test_parse_outline_entries(self):
+        """Test building ToC entries from PDF bookmarks."""
+        writer = PdfWriter()
+        for _ in range(3):
+            writer.add_blank_page(width=200, height=200)
+        chapter = writer.add_outline_item("1 Overview", 1)
+        writer.add_outline_item("1.1 Scope .......", 2, parent=chapter)
+        writer.add_outline_item("Revision History", 0)
+        buf = io.BytesIO()
+        writer.write(buf)
+        
+        pdf = pdfium.PdfDocument(buf.getvalue())
+        entries = parse_outline_entries(pdf, "USB PD Spec")
+        pdf.close()
+        
+        self.assertEqual([(e.section_id, e.title, e.page, e.parent_id) for e in entries],
+                         [("1", "Overview", 2, None), ("1.1", "Scope", 3, "1")])
+
+    def test_outline_and_text_pages_agree(self):
+        """Test that bookmarks and ToC text give the same printed pages."""
+        # A roman-numbered ToC page, then body pages numbered from 1
+        writer = PdfWriter()
+        add_text_page(writer, ["1 Overview .......... 1",
+                               "1.1 Scope .......... 2"])
+        for _ in range(2):
+            writer.add_blank_page(width=300, height=300)
+        writer.set_page_label(0, 0, style="/r", start=1)
+        writer.set_page_label(1, 2, style="/D", start=1)
+        chapter = writer.add_outline_item("1 Overview", 1)
+        writer.add_outline_item("1.1 Scope", 2, parent=chapter)
+        buf = io.BytesIO()
+        writer.write(buf)
+        
+        pdf = pdfium.PdfDocument(buf.getvalue())
+        outline_entries = parse_outline_entries(pdf, "USB PD Spec")
+        text_entries = parse_toc_entries(extract_page_text(pdf, 0), len(pdf),
+                                         "USB PD Spec")
+        pdf.close()
+        
+        self.assertEqual([e.to_dict() for e in outline_entries],
+                         [e.to_dict() for e in text_entries])
+        self.assertEqual([e.page for e in text_entries], [1, 2])
+
+
+    def test_chapter_only_outline_uses_toc_text(self):
+        """Test that an outline without subsections yields to the ToC text."""
+        writer = PdfWriter()
+        add_text_page(writer, ["1 Overview .......... 2",
+                               "1.1 Scope .......... 2",
+                               "2 Power Delivery .......... 3"])
+        for _ in range(2):
+            writer.add_blank_page(width=300, height=300)
+        writer.add_outline_item("1 Overview", 1)
+        writer.add_outline_item("2 Power Delivery", 2)
+        buf = io.BytesIO()
+        writer.write(buf)
+        
+        pdf = pdfium.PdfDocument(buf.getvalue())
+        outline_entries = parse_outline_entries(pdf, "USB PD Spec")
+        text_entries = parse_toc_entries(extract_page_text(pdf, 0), len(pdf),
+                                         "USB PD Spec")
+        pdf.close()
+        
+        self.assertEqual([e.section_id for e in outline_entries], ["1", "2"])
+        selected = select_toc_entries(outline_entries, text_entries)
+        self.assertEqual([e.section_id for e in selected], ["1", "1.1", "2"])
+        
+        # A complete outline is kept, and an empty one falls back
+        self.assertIs(select_toc_entries(text_entries, outline_entries), text_entries)
+        self.assertIs(select_toc_entries([], text_entries), text_entries)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import os
+import pickle
+import tempfile
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+from pdf_text import extract_pages, load_cached_pages, load_or_extract_pages
+
+
+def add_text_page(writer: PdfWriter, lines):
+    """Append a page showing each line of text in Helvetica."""
+    page = writer.add_blank_page(width=300, height=300)
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    page[NameObject("/Resources")] = DictionaryObject({
+        NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+    })
+    stream = DecodedStreamObject()
+    stream.set_data("BT /F1 10 Tf 14 TL 20 280 Td ".encode() + b"".join(
+        f"({line}) Tj T* ".encode() for line in lines) + b"ET")
+    page.replace_contents(stream)
+
+
+def write_blank_pdf(path: str, num_pages: int) -> None:
+    """Write a PDF of blank pages to path."""
+    writer = PdfWriter()
+    for _ in range(num_pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.pdf_path = os.path.join(self.tmp, "spec.pdf")
+        self.cache_path = os.path.join(self.tmp, "pages.pkl")
+        write_blank_pdf(self.pdf_path, 1)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_load_or_extract_pages_cache(self):
+        """Test that page texts are reused until the PDF's content changes."""
+        self.assertEqual(load_or_extract_pages(self.pdf_path, self.cache_path), [""])
+        
+        # A valid cache is returned as is, without re-extracting
+        with open(self.cache_path, "rb") as f:
+            key, _ = pickle.load(f)
+        with open(self.cache_path, "wb") as f:
+            pickle.dump((key, ["cached"]), f)
+        self.assertEqual(load_or_extract_pages(self.pdf_path, self.cache_path), ["cached"])
+        
+        # Touching the PDF keeps the cache; changing its content does not
+        stat = os.stat(self.pdf_path)
+        os.utime(self.pdf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(load_or_extract_pages(self.pdf_path, self.cache_path), ["cached"])
+        write_blank_pdf(self.pdf_path, 2)
+        self.assertEqual(load_or_extract_pages(self.pdf_path, self.cache_path), ["", ""])
+
+    def test_cache_version(self):
+        """Test that a cache from another extractor version is not reused."""
+        self.assertEqual(load_or_extract_pages(self.pdf_path, self.cache_path), [""])
+        self.assertEqual(load_cached_pages(self.pdf_path, self.cache_path,
+                                           lambda path: ["new"], version=0),
+                         ["new"])
+        self.assertEqual(load_cached_pages(self.pdf_path, self.cache_path,
+                                           lambda path: ["newer"], version=0),
+                         ["new"])
+        # The cache is moved into place, leaving no temporary files
+        self.assertEqual(sorted(os.listdir(self.tmp)), ["pages.pkl", "spec.pdf"])
+
+    def test_damaged_cache_is_replaced(self):
+        """Test that a damaged cache is re-extracted rather than crashing the run."""
+        for junk in (b"cbuiltins\nno_such_name\n.", b"cno_such_module\nx\n.", b"garbage"):
+            with open(self.cache_path, "wb") as f:
+                f.write(junk)
+            self.assertEqual(load_or_extract_pages(self.pdf_path, self.cache_path), [""])
+
+
+class TestExtractPages(unittest.TestCase):
+
+    def test_extract_pages_workers_keep_page_order(self):
+        """Test that parallel extraction returns every page, in order."""
+        writer = PdfWriter()
+        for i in range(5):
+            add_text_page(writer, [f"Page {i}"])
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, "spec.pdf")
+            with open(pdf_path, "wb") as f:
+                writer.write(f)
+            
+            pages = extract_pages(pdf_path, workers=2)
+            self.assertEqual([page.strip() for page in pages],
+                             [f"Page {i}" for i in range(5)])
+            self.assertEqual(pages, extract_pages(pdf_path, workers=1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import builtins
+import os
+import tempfile
+from unittest import mock
+
+from openpyxl import Workbook, load_workbook
+from validate_and_report import (EXCEL_CELL_MAX_CHARS, Counts, ValidationResult,
+                                 create_excel_report, save_workbook_with_fallback)
+
+
+class TestExcelReport(unittest.TestCase):
+
+    def setUp(self):
+        # The report is written to the working directory
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_long_table_list_overflows_to_sheet(self):
+        """Test that a table list too long for one cell gets its own sheet."""
+        toc_table_ids = [f"{i}-{j}" for i in range(1, 100) for j in range(1, 100)]
+        self.assertGreater(len(", ".join(toc_table_ids)), EXCEL_CELL_MAX_CHARS)
+        result = ValidationResult(
+            counts=Counts(toc_total=1, spec_total=1, missing_in_spec=0,
+                          extra_in_spec=0, order_errors=0),
+            missing=[], extra=[], order_mismatches=[],
+            toc_gaps=[], spec_gaps=[("1", "1.2")],
+            errors_toc=[], errors_spec=[(0, "'title' is a required property")],
+            toc_table_ids=toc_table_ids, doc_table_ids=["1-1", "X-1"]
+        )
+
+        path = create_excel_report(result)
+        self.assertEqual(path, "validation_report.xlsx")
+
+        wb = load_workbook(path)
+        self.assertEqual(wb.sheetnames, [
+            "overview", "missing_in_spec", "extra_in_spec", "order_mismatches",
+            "gaps_toc", "gaps_spec", "spec_schema_errors", "tables",
+            "missing_tables"
+        ])
+        tables = {row[0]: row[1] for row in wb["tables"].values}
+        self.assertEqual(tables["toc_tables_count"], len(toc_table_ids))
+        self.assertEqual(tables["missing_tables"],
+                         f"{len(toc_table_ids) - 1} tables, see the missing_tables sheet")
+        # A short list stays inline
+        self.assertEqual(tables["extra_tables"], "X-1")
+
+        missing_rows = [row[0] for row in wb["missing_tables"].values]
+        self.assertEqual(missing_rows, ["missing_tables"] + toc_table_ids[1:])
+        self.assertEqual(list(wb["gaps_spec"].values),
+                         [("parent_id", "missing_children"), ("1", "1.2")])
+
+    def test_save_falls_back_when_primary_path_is_locked(self):
+        """Test that a locked report file is replaced by a timestamped one."""
+        real_open = builtins.open
+
+        def locked_open(path, *args, **kwargs):
+            if path == "validation_report.xlsx":
+                raise PermissionError(13, "Permission denied", path)
+            return real_open(path, *args, **kwargs)
+
+        wb = Workbook(write_only=True)
+        wb.create_sheet("overview").append(["toc_total"])
+        with mock.patch("builtins.open", locked_open):
+            path = save_workbook_with_fallback(wb, "validation_report.xlsx")
+
+        self.assertRegex(path, r"^validation_report_\d{8}_\d{6}\.xlsx$")
+        self.assertEqual(os.listdir("."), [path])
+        self.assertEqual(list(load_workbook(path)["overview"].values), [("toc_total",)])
+
+
+if __name__ == '__main__':
+    unittest.main()
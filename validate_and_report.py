@@ -1,13 +1,25 @@
+import functools
 import json
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from typing import AbstractSet, Callable, Dict, List, Tuple, Optional
 from pathlib import Path
 
+import fastjsonschema
+import orjson
 from jsonschema import Draft7Validator
 from openpyxl import Workbook
 from datetime import datetime
 import re
-from pypdf import PdfReader
+from pdf_text import load_or_extract_pages
+
+
+# Most characters Excel keeps in a single cell
+EXCEL_CELL_MAX_CHARS = 32767
+
+# A "Table X-Y" label at the start of a line. Texts are searched with a
+# newline prepended, so every line start is a literal "\nTable" the regex
+# engine can skip ahead to instead of testing "^" at each character.
+_TABLE_LABEL_RE = re.compile(r"\nTable\s+(\d+-\d+)")
 
 
 @dataclass
@@ -37,18 +49,15 @@ def read_jsonl(path: str) -> List[dict]:
     """Read JSONL file and return list of dictionaries."""
     rows: List[dict] = []
     try:
-        with open(path, "r", encoding="utf-8") as f:
+        # orjson parses the raw UTF-8 bytes, with no decode to str first;
+        # its JSONDecodeError is a subclass of json's
+        with open(path, "rb") as f:
             for line in f:
-                line = line.strip()
-                if line:
-                    rows.append(json.loads(line))
+                if line.strip():
+                    rows.append(orjson.loads(line))
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error reading {path}: {e}")
         return []
-    except (FileNotFoundError, 
-            json.JSONDecodeError) as e:
-        print(f"Error reading {path}: {e}")
-        return []
     return rows
 
 
@@ -62,16 +71,48 @@ def load_schema(schema_path: str) -> Optional[dict]:
         return None
 
 
-def validate_rows(rows: List[dict], schema_path: str) -> List[Tuple[int, str]]:
-    """Validate rows against JSON schema."""
+@functools.lru_cache(maxsize=4)
+def load_validators(
+    schema_path: str
+) -> Optional[Tuple[Draft7Validator, Optional[Callable[[dict], object]]]]:
+    """Load a schema and build its validators, once per schema path.
+    
+    Returns the Draft7Validator and the fastjsonschema function (None if
+    fastjsonschema cannot compile the schema), or None if the schema
+    cannot be loaded.
+    """
     schema = load_schema(schema_path)
     if not schema:
+        return None
+    
+    try:
+        fast_validate = fastjsonschema.compile(schema)
+    except fastjsonschema.JsonSchemaDefinitionException:
+        fast_validate = None  # Schema not supported, use Draft7Validator only
+    return Draft7Validator(schema), fast_validate
+
+
+def validate_rows(rows: List[dict], schema_path: str) -> List[Tuple[int, str]]:
+    """Validate rows against JSON schema.
+    
+    Rows are checked with a validator generated by fastjsonschema, which
+    stops at the first error. Only rows it rejects are re-checked with
+    Draft7Validator, so every error message is still reported.
+    """
+    validators = load_validators(schema_path)
+    if validators is None:
         return []
     
-    validator = Draft7Validator(schema)
+    validator, fast_validate = validators
     errors: List[Tuple[int, str]] = []
     
     for idx, row in enumerate(rows):
+        if fast_validate is not None:
+            try:
+                fast_validate(row)
+                continue
+            except fastjsonschema.JsonSchemaValueException:
+                pass
         for error in validator.iter_errors(row):
             errors.append((idx, error.message))
     
@@ -84,21 +125,19 @@ def get_section_ids(rows: List[dict]) -> List[str]:
 
 
 def find_missing_and_extra_sections(
-    toc_ids: List[str], spec_ids: List[str]
+    toc_set: AbstractSet[str], spec_set: AbstractSet[str]
 ) -> Tuple[List[str], List[str]]:
     """Find missing and extra sections between TOC and spec."""
-    toc_set = set(toc_ids)
-    spec_set = set(spec_ids)
-    
-    missing = sorted(list(toc_set - spec_set))
-    extra = sorted(list(spec_set - toc_set))
+    missing = sorted(toc_set - spec_set)
+    extra = sorted(spec_set - toc_set)
     
     return missing, extra
 
 
-def find_order_mismatches(toc_ids: List[str], spec_ids: List[str]) -> List[str]:
-    """Find order mismatches between TOC and spec."""
-    spec_order_index = {sid: i for i, sid in enumerate(spec_ids)}
+def find_order_mismatches(
+    toc_ids: List[str], spec_order_index: Dict[str, int]
+) -> List[str]:
+    """Find order mismatches between TOC and spec, given spec ID positions."""
     order_mismatches = []
     last_index = -1
     
@@ -113,14 +152,16 @@ def find_order_mismatches(toc_ids: List[str], spec_ids: List[str]) -> List[str]:
 
 
 def compare_toc_vs_spec(
-    toc_rows: List[dict], spec_rows: List[dict]
+    toc_ids: List[str], spec_ids: List[str]
 ) -> Tuple[Counts, List[str], List[str], List[str]]:
-    """Compare TOC vs spec and return counts and differences."""
-    toc_ids = get_section_ids(toc_rows)
-    spec_ids = get_section_ids(spec_rows)
-    
-    missing, extra = find_missing_and_extra_sections(toc_ids, spec_ids)
-    order_mismatches = find_order_mismatches(toc_ids, spec_ids)
+    """Compare TOC vs spec section IDs and return counts and differences."""
+    # One dict over the spec IDs serves as both the position index for
+    # the order check and, through its keys view, the spec ID set
+    spec_order_index = {sid: i for i, sid in enumerate(spec_ids)}
+    missing, extra = find_missing_and_extra_sections(
+        set(toc_ids), spec_order_index.keys()
+    )
+    order_mismatches = find_order_mismatches(toc_ids, spec_order_index)
     
     counts = Counts(
         toc_total=len(toc_ids),
@@ -133,58 +174,44 @@ def compare_toc_vs_spec(
     return counts, missing, extra, order_mismatches
 
 
-def group_sections_by_parent(section_ids: List[str]) -> Dict[str, List[str]]:
-    """Group section IDs by their parent."""
-    by_parent: Dict[str, List[str]] = {}
+def group_sections_by_parent(section_ids: List[str]) -> Dict[str, List[int]]:
+    """Group the numeric last components of section IDs by their parent.
+    
+    Each ID is split once; a last component that is not a number is
+    recorded as -1.
+    """
+    by_parent: Dict[str, List[int]] = {}
     
     for sid in section_ids:
-        parent = (".".join(sid.split(".")[:-1]) 
-                 if "." in sid else "<root>")
-        by_parent.setdefault(parent, []).append(sid)
+        parts = sid.split(".")
+        parent = ".".join(parts[:-1]) if len(parts) > 1 else "<root>"
+        try:
+            num = int(parts[-1])
+        except ValueError:
+            num = -1
+        by_parent.setdefault(parent, []).append(num)
     
     return by_parent
 
 
-def get_numeric_last_component(section_id: str) -> int:
-    """Extract the numeric last component of a section ID."""
-    try:
-        return int(section_id.split(".")[-1])
-    except (ValueError, IndexError):
-        return -1
-
-
 def find_missing_numbers_in_sequence(nums: List[int]) -> List[int]:
     """Find missing numbers in a sequence."""
     if not nums:
         return []
     
-    expected = list(range(nums[0], nums[-1] + 1))
-    return [n for n in expected if n not in nums]
+    # Set membership keeps this linear; a list lookup made it quadratic
+    present = set(nums)
+    return [n for n in range(nums[0], nums[-1] + 1) if n not in present]
 
 
-def process_parent_group(parent: str, children: List[str]) -> Optional[Tuple[str, str]]:
+def process_parent_group(parent: str, children: List[int]) -> Optional[Tuple[str, str]]:
     """Process a single parent group to find gaps."""
+    # All children of one parent have the same depth, so unlike before
+    # there is no same-depth filtering to do
     if len(children) < 2:
         return None
     
-    # Only consider same-depth children
-    depth = len(children[0].split(".")) if children else 0
-    same_depth = [c for c in children if len(c.split(".")) == depth]
-    
-    if len(same_depth) < 2:
-        return None
-    
-    # Sort by numeric last component
-    same_depth.sort(key=get_numeric_last_component)
-    nums = [
-        get_numeric_last_component(s) for s in same_depth 
-        if get_numeric_last_component(s) >= 0
-    ]
-    nums = [
-        get_numeric_last_component(s) for s in same_depth 
-        if get_numeric_last_component(s) >= 0
-    ]
-    
+    nums = sorted(n for n in children if n >= 0)
     if not nums:
         return None
     
@@ -196,14 +223,9 @@ def process_parent_group(parent: str, children: List[str]) -> Optional[Tuple[str
         f"{parent}.{n}" if parent != "<root>" else str(n) 
         for n in missing_nums
     ]
-    missing_ids = [
-        f"{parent}.{n}" if parent != "<root>" else str(n) 
-        for n in missing_nums
-    ]
     
     parent_label = parent if parent != "<root>" else "<top-level>"
     gap_description = ", ".join(missing_ids)
-    gap_description = ", ".join(missing_ids)
     
     return (parent_label, gap_description)
 
@@ -221,71 +243,36 @@ def detect_gaps(section_ids: List[str]) -> List[Tuple[str, str]]:
     return gaps
 
 
-def extract_list_of_tables_text(reader: PdfReader, max_scan_pages: int = 120) -> str:
+def extract_list_of_tables_text(page_texts: List[str], max_scan_pages: int = 120) -> str:
     """Extract text from the beginning of the PDF for table list."""
-    text_parts: List[str] = []
-    
-    for i in range(min(max_scan_pages, len(reader.pages))):
-        text = reader.pages[i].extract_text()
-        if text:
-            text_parts.append(text)
-    
-    return "\n".join(text_parts)
+    return "\n".join(text for text in page_texts[:max_scan_pages] if text)
 
 
 def parse_tables_from_list(front_text: str) -> List[str]:
     """Parse 'List of Tables' style entries into table IDs."""
-    ids: List[str] = []
-    pattern = re.compile(
-        r"^Table\s+(\d+-\d+)[^\n]*?(?:\s+\d+)?\s*$", 
-        re.MULTILINE
-    )
+    ids = _TABLE_LABEL_RE.findall("\n" + front_text)
     
-    for match in pattern.finditer(front_text):
-        ids.append(match.group(1))
-    
-    # Deduplicate preserving order
-    seen = set()
-    unique_ids: List[str] = []
-    
-    for table_id in ids:
-        if table_id not in seen:
-            seen.add(table_id)
-            unique_ids.append(table_id)
-    
-    return unique_ids
+    # Deduplicate preserving order; dicts keep insertion order
+    return list(dict.fromkeys(ids))
 
 
-def scan_tables_in_document(reader: PdfReader) -> List[str]:
+def scan_tables_in_document(page_texts: List[str]) -> List[str]:
     """Scan entire PDF text for 'Table X-Y' labels and return unique IDs."""
     found: List[str] = []
-    pattern = re.compile(
-        r"^Table\s+(\d+-\d+)[^\n]*$", 
-        re.MULTILINE
-    )
     
-    for page in reader.pages:
-        text = page.extract_text()
-        if text:
-            for match in pattern.finditer(text):
-                found.append(match.group(1))
+    for text in page_texts:
+        # Most pages never mention a table; a substring test rules them out
+        # without copying the page text and running the regex over it
+        if text and "Table" in text:
+            found.extend(_TABLE_LABEL_RE.findall("\n" + text))
     
-    # Deduplicate preserving order
-    seen = set()
-    unique_ids: List[str] = []
-    
-    for table_id in found:
-        if table_id not in seen:
-            seen.add(table_id)
-            unique_ids.append(table_id)
-    
-    return unique_ids
+    # Deduplicate preserving order; dicts keep insertion order
+    return list(dict.fromkeys(found))
 
 
 def create_overview_sheet(wb: Workbook, counts: Counts, errors_toc: List, errors_spec: List) -> None:
     """Create the overview sheet with summary statistics."""
-    ws_overview = wb.active
-    ws_overview.title = "overview"
+    ws_overview = wb.create_sheet("overview")
     
     headers = [
         "toc_total", "spec_total", "missing_in_spec", "extra_in_spec",
@@ -300,6 +287,15 @@ def create_overview_sheet(wb: Workbook, counts: Counts, errors_toc: List, errors
     ws_overview.append(values)
 
 
+def append_rows(ws, header: List, rows) -> None:
+    """Append a header row and then every row in rows to a worksheet."""
+    # Bound once rather than looked up on the worksheet for every row
+    append = ws.append
+    append(header)
+    for row in rows:
+        append(row)
+
+
 def create_analysis_sheets(
     wb: Workbook, missing: List[str], extra: List[str], 
     order_mismatches: List[str], toc_gaps: List[Tuple], 
@@ -307,49 +303,35 @@ def create_analysis_sheets(
 ) -> None:
     """Create analysis sheets for different types of issues."""
     # Missing sections
-    ws_missing = wb.create_sheet("missing_in_spec")
-    ws_missing.append(["missing_in_spec"])
-    for section_id in missing:
-        ws_missing.append([section_id])
+    append_rows(wb.create_sheet("missing_in_spec"), ["missing_in_spec"],
+                ([section_id] for section_id in missing))
 
     # Extra sections
-    ws_extra = wb.create_sheet("extra_in_spec")
-    ws_extra.append(["extra_in_spec"])
-    for section_id in extra:
-        ws_extra.append([section_id])
+    append_rows(wb.create_sheet("extra_in_spec"), ["extra_in_spec"],
+                ([section_id] for section_id in extra))
 
     # Order mismatches
-    ws_order = wb.create_sheet("order_mismatches")
-    ws_order.append(["order_mismatches"])
-    for section_id in order_mismatches:
-        ws_order.append([section_id])
+    append_rows(wb.create_sheet("order_mismatches"), ["order_mismatches"],
+                ([section_id] for section_id in order_mismatches))
 
     # TOC gaps
-    ws_gaps_toc = wb.create_sheet("gaps_toc")
-    ws_gaps_toc.append(["parent_id", "missing_children"])
-    for parent, missing_list in toc_gaps:
-        ws_gaps_toc.append([parent, missing_list])
+    append_rows(wb.create_sheet("gaps_toc"), ["parent_id", "missing_children"],
+                toc_gaps)
 
     # Spec gaps
-    ws_gaps_spec = wb.create_sheet("gaps_spec")
-    ws_gaps_spec.append(["parent_id", "missing_children"])
-    for parent, missing_list in spec_gaps:
-        ws_gaps_spec.append([parent, missing_list])
+    append_rows(wb.create_sheet("gaps_spec"), ["parent_id", "missing_children"],
+                spec_gaps)
 
 
 def create_error_sheets(wb: Workbook, errors_toc: List, errors_spec: List) -> None:
     """Create sheets for schema validation errors."""
     if errors_toc:
-        ws_toc_err = wb.create_sheet("toc_schema_errors")
-        ws_toc_err.append(["row_index", "error"]) 
-        for idx, msg in errors_toc:
-            ws_toc_err.append([idx, msg])
+        append_rows(wb.create_sheet("toc_schema_errors"),
+                    ["row_index", "error"], errors_toc)
     
     if errors_spec:
-        ws_spec_err = wb.create_sheet("spec_schema_errors")
-        ws_spec_err.append(["row_index", "error"]) 
-        for idx, msg in errors_spec:
-            ws_spec_err.append([idx, msg])
+        append_rows(wb.create_sheet("spec_schema_errors"),
+                    ["row_index", "error"], errors_spec)
 
 
 def create_table_analysis_sheet(
@@ -367,20 +349,39 @@ def create_table_analysis_sheet(
     missing_tables = [t for t in toc_table_ids if t not in doc_table_set]
     extra_tables = [t for t in doc_table_ids if t not in toc_table_set]
     
-    ws_tables.append(["missing_tables", ", ".join(missing_tables)])
-    ws_tables.append(["extra_tables", ", ".join(extra_tables)])
+    # Long lists go to a sheet of their own, one ID per row, instead of
+    # a cell Excel would truncate
+    overflow = []
+    for metric, table_ids in (("missing_tables", missing_tables),
+                              ("extra_tables", extra_tables)):
+        value = ", ".join(table_ids)
+        if len(value) > EXCEL_CELL_MAX_CHARS:
+            value = f"{len(table_ids)} tables, see the {metric} sheet"
+            overflow.append((metric, table_ids))
+        ws_tables.append([metric, value])
+    
+    for metric, table_ids in overflow:
+        append_rows(wb.create_sheet(metric), [metric],
+                    ([table_id] for table_id in table_ids))
 
 
 def save_workbook_with_fallback(workbook: Workbook, primary_path: str) -> str:
-    """Save workbook with fallback to timestamped filename."""
+    """Save workbook with fallback to timestamped filename.
+    
+    The output file is opened before saving, because a write-only
+    workbook can only be saved once: a save that fails part-way through
+    could not be retried under the fallback name.
+    """
     try:
-        workbook.save(primary_path)
-        return primary_path
+        f = open(primary_path, "wb")
+        path = primary_path
     except PermissionError:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        alt_path = f"validation_report_{timestamp}.xlsx"
-        workbook.save(alt_path)
-        return alt_path
+        path = f"validation_report_{timestamp}.xlsx"
+        f = open(path, "wb")
+    with f:
+        workbook.save(f)
+    return path
 
 
 def perform_validation() -> ValidationResult:
@@ -401,24 +402,32 @@ def perform_validation() -> ValidationResult:
     errors_spec = validate_rows(spec_rows, "schema_sections.json")
     print(f"   Found {len(errors_spec)} sections schema errors")
 
+    # Pull the section ID column out once; comparison and gap detection
+    # both work on it
+    toc_ids = get_section_ids(toc_rows)
+    spec_ids = get_section_ids(spec_rows)
+
     print("⚖️ Comparing TOC vs sections...")
-    counts, missing, extra, order_mismatches = compare_toc_vs_spec(toc_rows, spec_rows)
+    counts, missing, extra, order_mismatches = compare_toc_vs_spec(toc_ids, spec_ids)
     print(f"   TOC: {counts.toc_total}, Sections: {counts.spec_total}")
     print(f"   Missing: {counts.missing_in_spec}, Extra: {counts.extra_in_spec}")
 
     print("🔍 Detecting gaps in TOC...")
-    toc_gaps = detect_gaps([r["section_id"] for r in toc_rows])
+    toc_gaps = detect_gaps(toc_ids)
     print(f"   Found {len(toc_gaps)} TOC gaps")
     
     print("🔍 Detecting gaps in sections...")
-    spec_gaps = detect_gaps([r["section_id"] for r in spec_rows])
+    spec_gaps = detect_gaps(spec_ids)
     print(f"   Found {len(spec_gaps)} section gaps")
 
     print("📋 Analyzing tables...")
-    reader = PdfReader("usb_pd_spec.pdf")
-    front_text = extract_list_of_tables_text(reader)
+    # Pages come from the parsers' PDFium page cache, so nothing is
+    # re-extracted after parse_toc.py/parse_sections.py have run; the
+    # List of Tables scan reuses the front pages
+    page_texts = load_or_extract_pages("usb_pd_spec.pdf")
+    front_text = extract_list_of_tables_text(page_texts)
     toc_table_ids = parse_tables_from_list(front_text)
-    doc_table_ids = scan_tables_in_document(reader)
+    doc_table_ids = scan_tables_in_document(page_texts)
     print(f"   TOC tables: {len(toc_table_ids)}, Document tables: {len(doc_table_ids)}")
 
     return ValidationResult(
@@ -438,7 +447,8 @@ def perform_validation() -> ValidationResult:
 def create_excel_report(result: ValidationResult) -> str:
     """Create Excel report from validation results."""
     print("📊 Creating Excel workbook...")
-    wb = Workbook()
+    # Write-only mode streams rows out instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
     
     print("📋 Creating overview sheet...")
     create_overview_sheet(wb, result.counts, result.errors_toc, result.errors_spec)